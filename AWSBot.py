@@ -8,9 +8,21 @@ import configparser
 import os
 import json
 import logging
+import zipfile
+import io
+import copy
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
 import time
 
+#slotTable is part of the Lambda code and is shared with it.  It is loaded by path so that the module compiled with 
+#here is always the one shipped in the Lambda package, whatever else is on the import path
+LAMBDA_CODE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', 'Lambda', 'code')
+_spec = importlib.util.spec_from_file_location('slotTable', os.path.join(LAMBDA_CODE_DIR, 'slotTable.py'))
+slotTable = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(slotTable)
+
 logger = logging.getLogger('awsbot')
 hdlr = logging.StreamHandler()
 formatter = logging.Formatter('%(asctime)s %(levelname)-8s %(module)-8s %(funcName)-8s %(message)s')
@@ -18,18 +30,42 @@ hdlr.setFormatter(formatter)
 logger.addHandler(hdlr) 
 logger.setLevel(logging.DEBUG)
 
+TRAFFIC_PROFILES = ['none', 'keepwarm', 'provisioned']
+KEEP_WARM_EVENT = {'keepWarm' : True}  #payload of the scheduled keep-warm invocation.  Recognized by the Lambda handler
+
+
+def createClient(service, region):
+    '''Default client factory.  Creates a boto3 client for a service and region.
+    
+        Args:
+            service: AWS service name, e.g. 'lambda'
+            region: AWS region, or None for the configured default region
+        
+        Returns:
+            boto3 client
+        
+        Raises:
+            Various AWS boto3 exceptions
+    '''
+    return boto3.client(service, region_name=region)
+
 
 class AWSBot(object):
     '''
     Class containing all the functionality to build, test, and destroy a chatbot on AWS Lex programmatically 
     via the AWS SDK for Python.
     '''   
-    def __init__(self, config):
+    def __init__(self, config, region=None, buildClient=None, testClient=None, lambdaClient=None, dbClient=None, 
+                 eventsClient=None, clientFactory=createClient):
         '''Fetches user options and sets instance variables.
         
         Args:
             self: Instance reference 
             filename: Name of configuration file
+            region: Optional AWS region for the default clients.  The configured default region is used if None
+            buildClient, testClient, lambdaClient, dbClient, eventsClient: Optional boto3 clients, e.g. stubbed 
+                clients for testing.  Clients not supplied are created with clientFactory
+            clientFactory: Function taking a service name and region and returning a client.  Also used by forRegion
         
         Returns:
             None
@@ -37,13 +73,80 @@ class AWSBot(object):
         Raises:
             NoSectionError: Raised if section is missing in config file
             NoOptionError: Raised if option is missing in config file
+            ValueError: Raised if the traffic profile is not supported
         '''
         logger.debug('Entering')
-        self.bot, self.slots, self.intents, self._lambda, self.permissions = self.__loadResources(config)
-        self.buildClient = boto3.client('lex-models')
-        self.testClient = boto3.client('lex-runtime')
-        self.lambdaClient = boto3.client('lambda')
+        self.bot, self.slots, self.intents, self._lambda, self.permissions, self.table = self.__loadResources(config)
+        self.traffic = self.__loadTraffic(config)
+        if self.traffic['alias']:
+            self.__qualifyCodeHooks(self.traffic['alias'])
+        self.region = region
+        self.clientFactory = clientFactory
+        self.buildClient = buildClient or clientFactory('lex-models', region)
+        self.testClient = testClient or clientFactory('lex-runtime', region)
+        self.lambdaClient = lambdaClient or clientFactory('lambda', region)
+        self.dbClient = dbClient or clientFactory('dynamodb', region)
+        self.eventsClient = eventsClient or clientFactory('events', region)
         logger.debug('Exiting')  
+    
+    def __regionalizeArn(self, arn, region):
+        '''Replaces the region field of an ARN.  ARNs of global services, e.g. IAM, have no region and are unchanged.
+        
+        Args:
+            self: Instance reference 
+            arn: ARN string
+            region: AWS region
+        
+        Returns:
+            ARN string for the given region
+        
+        Raises:
+            None
+        '''
+        parts = arn.split(':')
+        if len(parts) > 3 and parts[3]:
+            parts[3] = region
+        return ':'.join(parts)
+    
+    def forRegion(self, region, role=None):
+        '''Creates a copy of this bot that deploys the already packaged resources to another region.  Region-specific 
+        ARNs in the intent code hooks and Lambda permissions are rewritten, and clients are created for the region with 
+        the client factory.
+        
+        Args:
+            self: Instance reference 
+            region: AWS region
+            role: Optional ARN of the Lambda execution role to use in the region
+        
+        Returns:
+            AWSBot instance for the region
+        
+        Raises:
+            None
+        '''
+        logger.debug('Entering')
+        regional = copy.copy(self)
+        regional.region = region
+        regional.bot, regional.slots, regional.intents, regional._lambda, regional.permissions, regional.table = \
+            copy.deepcopy((self.bot, self.slots, self.intents, self._lambda, self.permissions, self.table))
+        
+        for intent in regional.intents:
+            hooks = [intent.get('dialogCodeHook'), intent.get('fulfillmentActivity', {}).get('codeHook')]
+            for hook in hooks:
+                if hook:
+                    hook['uri'] = self.__regionalizeArn(hook['uri'], region)
+        for permission in regional.permissions:
+            permission['SourceArn'] = self.__regionalizeArn(permission['SourceArn'], region)
+        if role:
+            regional._lambda['Role'] = role
+        
+        regional.buildClient = self.clientFactory('lex-models', region)
+        regional.testClient = self.clientFactory('lex-runtime', region)
+        regional.lambdaClient = self.clientFactory('lambda', region)
+        regional.dbClient = self.clientFactory('dynamodb', region)
+        regional.eventsClient = self.clientFactory('events', region)
+        logger.debug('Exiting')
+        return regional
         
     def __dateSerializer(self, obj):
         '''Custom string serializer for date/datetime objects
@@ -70,7 +173,7 @@ class AWSBot(object):
             config: Name of directory containing the JSON files
         
         Returns:
-            Dict config objects the bot, intents, slots, lambda codehook, and lambda permission
+            Dict config objects the bot, intents, slots, lambda codehook, lambda permission, and order table
         
         Raises:
             None
@@ -108,7 +211,7 @@ class AWSBot(object):
             _lambda = json.load(file)
         with open(os.path.join(dirname,_lambda['Code']['ZipFile']), 'rb') as zipFile:
             zipBytes = zipFile.read()
-        _lambda['Code']['ZipFile'] = zipBytes    
+        _lambda['Code']['ZipFile'] = self.__packageLambda(zipBytes, self.__compileSlotTypes(slots))
         
         permissionsDir = cfgParser.get('AWSBot', 'permissionsDir')
         permissions = []
@@ -118,10 +221,133 @@ class AWSBot(object):
                     jobj = json.load(file)
                     permissions.append(jobj)
                     logger.debug(json.dumps(jobj, indent=4, sort_keys=True))      
-        return bot, slots, intents, _lambda, permissions
+        
+        filename = cfgParser.get('AWSBot', 'tableJsonFile')
+        with open(filename, 'r') as file:
+            table = json.load(file)
+        return bot, slots, intents, _lambda, permissions, table
+    
+    def __loadTraffic(self, config):
+        '''Loads the declared traffic profile of the Lambda.  A missing Traffic section is equivalent to profile none.
+        
+        Args:
+            self: Instance reference 
+            config: Name of configuration file
+        
+        Returns:
+            Dict with the profile, alias, provisioned concurrency, and keep-warm schedule
+        
+        Raises:
+            ValueError: Raised if the traffic profile is not supported
+        '''
+        logger.debug('Entering')
+        cfgParser = configparser.ConfigParser()
+        cfgParser.optionxform = str
+        cfgParser.read(config)
+        
+        traffic = {
+                    'profile': cfgParser.get('Traffic', 'profile', fallback='none'),
+                    'alias': cfgParser.get('Traffic', 'alias', fallback='live'),
+                    'provisionedConcurrency': cfgParser.getint('Traffic', 'provisionedConcurrency', fallback=1),
+                    'keepWarmSchedule': cfgParser.get('Traffic', 'keepWarmSchedule', fallback='rate(5 minutes)')
+                }
+        if traffic['profile'] not in TRAFFIC_PROFILES:
+            raise ValueError('Traffic profile {} not supported'.format(traffic['profile']))
+        if traffic['profile'] == 'none':
+            traffic['alias'] = None
+        logger.debug(json.dumps(traffic, indent=4, sort_keys=True))
+        logger.debug('Exiting')
+        return traffic
+    
+    def __qualifyCodeHooks(self, alias):
+        '''Points the intent code hooks at the Lambda alias so Lex invokes the published, warmed version.  
+        
+        Args:
+            self: Instance reference 
+            alias: Name of the Lambda alias
+        
+        Returns:
+            None
+        
+        Raises:
+            None
+        '''
+        for intent in self.intents:
+            hooks = [intent.get('dialogCodeHook'), intent.get('fulfillmentActivity', {}).get('codeHook')]
+            for hook in hooks:
+                if hook and len(hook['uri'].split(':')) == 7:  #arn:aws:lambda:region:account:function:name
+                    hook['uri'] = hook['uri'] + ':' + alias
+    
+    def __compileSlotTypes(self, slots):
+        '''Compiles the slot type enumerations into a lookup table with the slotTable module shared with the Lambda.
+        
+        Args:
+            self: Instance reference 
+            slots: List of slot type config objects
+        
+        Returns:
+            Dict of slot type name to a dict of normalized value/synonym to canonical value
+        
+        Raises:
+            ValueError: Raised if a value or synonym maps to two different canonical values within a slot type
+        '''
+        logger.debug('Entering')
+        table = slotTable.compileSlotTypes(slots)
+        logger.debug(json.dumps(table, indent=4, sort_keys=True))
+        logger.debug('Exiting')
+        return table
+    
+    def __packageLambda(self, zipBytes, table):
+        '''Adds the compiled slot type lookup table and the slotTable module to the Lambda code package.  Replaces 
+        copies from a prior build.
+        
+        Args:
+            self: Instance reference 
+            zipBytes: Bytes of the zipped Lambda code package
+            table: Compiled slot type lookup table
+        
+        Returns:
+            Bytes of the zipped Lambda code package including the lookup table and module
+        
+        Raises:
+            zipfile.BadZipFile: Raised if zipBytes is not a valid zip archive
+        '''
+        module = os.path.basename(slotTable.__file__)
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(io.BytesIO(zipBytes), 'r') as src, zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as dst:
+            for item in src.infolist():
+                if item.filename not in [slotTable.SLOT_TABLE_FILE, module]:
+                    dst.writestr(item, src.read(item.filename))
+            dst.writestr(slotTable.SLOT_TABLE_FILE, json.dumps(table, separators=(',', ':'), sort_keys=True))
+            dst.write(slotTable.__file__, module)
+        return buffer.getvalue()
+        
+    def __buildTable(self):
+        '''Builds the AWS DynamoDB table that the Lambda writes fulfilled orders to.  Waits for the table to become active.
+        An existing table, e.g. one kept from a prior destroy, is reused along with its orders.
+        
+        Args:
+            self: Instance reference 
+
+        Returns:
+            None
+        
+        Raises:
+            Various AWS boto3 exceptions
+        '''    
+        logger.debug('Entering')
+        try:
+            resp = self.dbClient.create_table(**self.table)
+            logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer))
+            self.created['table'] = True
+        except self.dbClient.exceptions.ResourceInUseException:
+            logger.debug('Table {} exists'.format(self.table['TableName']))
+        self.dbClient.get_waiter('table_exists').wait(TableName=self.table['TableName'])
+        logger.debug('Exiting')
         
     def __buildLambda(self):
-        '''Builds the AWS Lambda object via a zipped python code package.  Adds a permission to be called from the Lex intent
+        '''Builds the AWS Lambda object via a zipped python code package.  Adds a permission to be called from the Lex intent.
+        Waits for the function to become active before anything else is done with it.
         
         Args:
             self: Instance reference 
@@ -135,16 +361,113 @@ class AWSBot(object):
         logger.debug('Entering')
         resp = self.lambdaClient.create_function(**self._lambda)
         logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer))
+        self.created['lambda'] = True
+        self.lambdaClient.get_waiter('function_active_v2').wait(FunctionName=self._lambda['FunctionName'])
+        
+        alias = self.traffic['alias']
+        if alias:
+            self.__buildAlias(alias)
         
         for permission in self.permissions:
+            if alias:
+                permission = dict(permission, Qualifier=alias)
             resp = self.lambdaClient.add_permission(**permission)
             logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer))
+        
+        if self.traffic['profile'] == 'provisioned':
+            self.__buildProvisionedConcurrency(alias)
+        elif self.traffic['profile'] == 'keepwarm':
+            self.__buildKeepWarm(alias)
         '''
         resp = self.lambdaClient.add_permission(**self.permission)
         logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer))
         '''
         logger.debug('Exiting')
     
+    def __buildAlias(self, alias):
+        '''Publishes a version of the Lambda and points an alias at it.  Waits for the version to become active, so 
+        that permissions and provisioned concurrency can be added to the alias.
+        
+        Args:
+            self: Instance reference 
+            alias: Name of the Lambda alias
+
+        Returns:
+            None
+        
+        Raises:
+            Various AWS boto3 exceptions
+        '''    
+        logger.debug('Entering')
+        resp = self.lambdaClient.publish_version(FunctionName=self._lambda['FunctionName'])
+        logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer))
+        version = resp['Version']
+        self.lambdaClient.get_waiter('published_version_active').wait(FunctionName=self._lambda['FunctionName'], 
+                                                                      Qualifier=version)
+        
+        resp = self.lambdaClient.create_alias(FunctionName=self._lambda['FunctionName'], Name=alias, 
+                                              FunctionVersion=version)
+        logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer))
+        self.aliasArn = resp['AliasArn']
+        logger.debug('Exiting')
+    
+    def __buildProvisionedConcurrency(self, alias):
+        '''Configures provisioned concurrency on the Lambda alias so that initialized instances are always available
+        
+        Args:
+            self: Instance reference 
+            alias: Name of the Lambda alias
+
+        Returns:
+            None
+        
+        Raises:
+            Various AWS boto3 exceptions
+        '''    
+        logger.debug('Entering')
+        resp = self.lambdaClient.put_provisioned_concurrency_config(FunctionName=self._lambda['FunctionName'], 
+                                        Qualifier=alias, 
+                                        ProvisionedConcurrentExecutions=self.traffic['provisionedConcurrency'])
+        logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer))
+        logger.debug('Exiting')
+    
+    def __buildKeepWarm(self, alias):
+        '''Builds a scheduled CloudWatch Events rule that invokes the Lambda alias with a keep-warm ping.  Adds a 
+        permission for the rule to call the alias.
+        
+        Args:
+            self: Instance reference 
+            alias: Name of the Lambda alias
+
+        Returns:
+            None
+        
+        Raises:
+            Various AWS boto3 exceptions
+        '''    
+        logger.debug('Entering')
+        ruleName = self._lambda['FunctionName'] + '-keepwarm'
+        resp = self.eventsClient.put_rule(Name=ruleName, ScheduleExpression=self.traffic['keepWarmSchedule'], 
+                                          State='ENABLED')
+        logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer))
+        self.created['keepWarm'] = True
+        
+        permission = {
+                        'Action': 'lambda:InvokeFunction',
+                        'FunctionName': self._lambda['FunctionName'],
+                        'Qualifier': alias,
+                        'Principal': 'events.amazonaws.com',
+                        'SourceArn': resp['RuleArn'],
+                        'StatementId': ruleName
+                    }
+        resp = self.lambdaClient.add_permission(**permission)
+        logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer))
+        
+        target = {'Id': ruleName, 'Arn': self.aliasArn, 'Input': json.dumps(KEEP_WARM_EVENT)}
+        resp = self.eventsClient.put_targets(Rule=ruleName, Targets=[target])
+        logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer))
+        logger.debug('Exiting')
+    
     def __buildSlotTypes(self):
         '''Builds the AWS Lex slot objects via a JSON config file
         
@@ -161,6 +484,7 @@ class AWSBot(object):
         for slot in self.slots:
             resp = self.buildClient.put_slot_type(**slot)
             logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer))
+            self.created['slotTypes'].append(slot['name'])
         logger.debug('Exiting')
         
     def __buildIntents(self):
@@ -179,6 +503,7 @@ class AWSBot(object):
         for intent in self.intents:
             resp = self.buildClient.put_intent(**intent)
             logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer))
+            self.created['intents'].append(intent['name'])
         logger.debug('Exiting')
         
     def __buildBot(self):
@@ -189,18 +514,22 @@ class AWSBot(object):
             self: Instance reference 
 
         Returns:
-            None
+            Final bot status string: READY, FAILED, or TIMEOUT
         
         Raises:
             Various AWS boto3 exceptions
         '''    
         logger.debug('Entering')
         self.buildClient.put_bot(**self.bot)
+        self.created['bot'] = True
         complete = False
+        status = 'TIMEOUT'
         for _ in range(20):
             time.sleep(20)
             resp = self.buildClient.get_bot(name=self.bot['name'], versionOrAlias='$LATEST')
             logger.debug(resp['status'])
+            if resp['status'] in ['FAILED', 'READY']:
+                status = resp['status']
             if resp['status'] == 'FAILED':
                 logger.debug('***Bot Build Failed***')
                 logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer))
@@ -215,49 +544,76 @@ class AWSBot(object):
             logger.debug('***Bot Build Timed Out***')
             logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer)) 
         logger.debug('Exiting')
+        return status
     
-    def __destroySlotTypes(self):
-        '''Deletes the AWS Lex slot types objects.  
+    def __recordFailure(self, failures, resource, err):
+        '''Logs a failed delete and records it, unless the resource did not exist.
         
         Args:
             self: Instance reference 
+            failures: Dict of resource to error string that is added to
+            resource: Description of the resource, e.g. 'intent OrderFirewood'
+            err: Exception raised by the delete
 
         Returns:
             None
         
         Raises:
-            Various AWS boto3 exceptions
+            None
+        '''
+        logger.debug(err)
+        code = getattr(err, 'response', {}).get('Error', {}).get('Code')
+        if code not in ['NotFoundException', 'ResourceNotFoundException']:
+            failures[resource] = str(err)
+    
+    def __destroySlotTypes(self, names):
+        '''Deletes the AWS Lex slot types objects.  
+        
+        Args:
+            self: Instance reference 
+            names: List of slot type names
+
+        Returns:
+            Dict of resource to error string for each failed delete
+        
+        Raises:
+            None
         '''    
         logger.debug('Entering')  
-        for slot in self.slots:
+        failures = {}
+        for name in names:
             try:
-                resp = self.buildClient.delete_slot_type(name=slot['name'])
+                resp = self.buildClient.delete_slot_type(name=name)
                 logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer))
             except Exception as err:
-                logger.debug(err)
+                self.__recordFailure(failures, 'slot type ' + name, err)
         logger.debug('Exiting')
+        return failures
             
-    def __destroyIntents(self):
+    def __destroyIntents(self, names):
         '''Deletes the AWS Lex intent objects.  
         
         Args:
             self: Instance reference 
+            names: List of intent names
 
         Returns:
-            None
+            Dict of resource to error string for each failed delete
         
         Raises:
-            Various AWS boto3 exceptions
+            None
         '''    
         logger.debug('Entering')
-        for intent in self.intents:
+        failures = {}
+        for name in names:
             try:
-                resp = self.buildClient.delete_intent(name=intent['name'])
+                resp = self.buildClient.delete_intent(name=name)
                 logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer))
             except Exception as err:
-                logger.debug(err)
+                self.__recordFailure(failures, 'intent ' + name, err)
             time.sleep(5)  #artificial delay to allow the operation to be completed on AWS
         logger.debug('Exiting')
+        return failures
     
     def __destroyLambda(self):
         '''Deletes the AWS Lambda object.  
@@ -266,18 +622,68 @@ class AWSBot(object):
             self: Instance reference 
 
         Returns:
-            None
+            Dict of resource to error string for each failed delete
         
         Raises:
-            Various AWS boto3 exceptions
+            None
         '''    
         logger.debug('Entering')
+        failures = {}
         try:
             resp = self.lambdaClient.delete_function(FunctionName=self._lambda['FunctionName'])
             logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer))
         except Exception as err:
-            logger.debug(err)
+            self.__recordFailure(failures, 'function ' + self._lambda['FunctionName'], err)
         logger.debug('Exiting')
+        return failures
+    
+    def __destroyKeepWarm(self):
+        '''Deletes the keep-warm CloudWatch Events rule and its target.  The Lambda alias and its provisioned 
+        concurrency are deleted along with the function.
+        
+        Args:
+            self: Instance reference 
+
+        Returns:
+            Dict of resource to error string for each failed delete
+        
+        Raises:
+            None
+        '''    
+        logger.debug('Entering')
+        failures = {}
+        ruleName = self._lambda['FunctionName'] + '-keepwarm'
+        try:
+            resp = self.eventsClient.remove_targets(Rule=ruleName, Ids=[ruleName])
+            logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer))
+            resp = self.eventsClient.delete_rule(Name=ruleName)
+            logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer))
+        except Exception as err:
+            self.__recordFailure(failures, 'rule ' + ruleName, err)
+        logger.debug('Exiting')
+        return failures
+    
+    def __destroyTable(self):
+        '''Deletes the AWS DynamoDB order table.  
+        
+        Args:
+            self: Instance reference 
+
+        Returns:
+            Dict of resource to error string for each failed delete
+        
+        Raises:
+            None
+        '''    
+        logger.debug('Entering')
+        failures = {}
+        try:
+            resp = self.dbClient.delete_table(TableName=self.table['TableName'])
+            logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer))
+        except Exception as err:
+            self.__recordFailure(failures, 'table ' + self.table['TableName'], err)
+        logger.debug('Exiting')
+        return failures
     
     def __destroyBot(self):
         '''Deletes the AWS Lex bot object.  
@@ -286,22 +692,24 @@ class AWSBot(object):
             self: Instance reference 
 
         Returns:
-            None
+            Dict of resource to error string for each failed delete
         
         Raises:
-            Various AWS boto3 exceptions
+            None
         '''    
         logger.debug('Entering')
+        failures = {}
         try:
             resp = self.buildClient.delete_bot(name=self.bot['name'])
             logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer))
         except Exception as err:
-            logger.debug(err)
+            self.__recordFailure(failures, 'bot ' + self.bot['name'], err)
         time.sleep(5) #artificial delay to allow the operation to be completed on AWS
         logger.debug('Exiting')
+        return failures
     
-    def build(self):
-        '''Public function that calls private functions to build the various AWS Lex/Lambda objects.  
+    def validate(self):
+        '''Public function that checks the packaged resources for consistency before anything is built on AWS.
         
         Args:
             self: Instance reference 
@@ -309,16 +717,72 @@ class AWSBot(object):
         Returns:
             None
         
+        Raises:
+            ValueError: Raised with a list of all problems found
+        '''    
+        logger.debug('Entering')
+        problems = []
+        functionName = self._lambda['FunctionName']
+        
+        with zipfile.ZipFile(io.BytesIO(self._lambda['Code']['ZipFile']), 'r') as package:
+            names = package.namelist()
+        module = self._lambda['Handler'].rsplit('.', 1)[0] + '.py'
+        for name in [module, slotTable.SLOT_TABLE_FILE, os.path.basename(slotTable.__file__)]:
+            if name not in names:
+                problems.append('Lambda package is missing {}'.format(name))
+        
+        intentNames = [intent['name'] for intent in self.intents]
+        for intent in self.bot['intents']:
+            if intent['intentName'] not in intentNames:
+                problems.append('Bot intent {} is not defined'.format(intent['intentName']))
+        
+        slotNames = [slot['name'] for slot in self.slots]
+        for intent in self.intents:
+            for slot in intent['slots']:
+                if not slot['slotType'].startswith('AMAZON.') and slot['slotType'] not in slotNames:
+                    problems.append('Intent {} uses undefined slot type {}'.format(intent['name'], slot['slotType']))
+            hooks = [intent.get('dialogCodeHook'), intent.get('fulfillmentActivity', {}).get('codeHook')]
+            for hook in hooks:
+                if not hook:
+                    continue
+                parts = hook['uri'].split(':')  #arn:aws:lambda:region:account:function:name[:qualifier]
+                if len(parts) not in [7, 8] or parts[5] != 'function':
+                    problems.append('Intent {} code hook {} is not a Lambda function ARN'.format(intent['name'], 
+                                                                                              hook['uri']))
+                elif parts[6] != functionName:
+                    problems.append('Intent {} code hook does not call {}'.format(intent['name'], functionName))
+        
+        for permission in self.permissions:
+            if permission['FunctionName'] != functionName:
+                problems.append('Permission {} is not for {}'.format(permission['StatementId'], functionName))
+        
+        if problems:
+            raise ValueError('; '.join(problems))
+        logger.debug('Exiting')
+    
+    def build(self):
+        '''Public function that calls private functions to build the various AWS Lex/Lambda objects.  The objects 
+        created are recorded for rollback.
+        
+        Args:
+            self: Instance reference 
+
+        Returns:
+            Final bot status string: READY, FAILED, or TIMEOUT
+        
         Raises:
             Various AWS boto3 exceptions
         '''    
         logger.debug('Entering')  
+        self.created = {'table': False, 'lambda': False, 'keepWarm': False, 'slotTypes': [], 'intents': [], 'bot': False}
+        self.__buildTable()
         self.__buildLambda()
         self.__buildSlotTypes()
         self.__buildIntents()
-        self.__buildBot()
+        status = self.__buildBot()
     
         logger.debug('Exiting')
+        return status
     
     def test(self, msg):
         '''Public function that provides the ability to send a test text into the Lex bot
@@ -343,29 +807,219 @@ class AWSBot(object):
         logger.debug(json.dumps(resp, indent=4, sort_keys=True, default=self.__dateSerializer)) 
         logger.debug('Exiting')
         
-    def destroy(self):
-        '''Public function that calls private functions to delete the various AWS Lex/Lambda objects.  
+    def destroy(self, dropTable=False):
+        '''Public function that calls private functions to delete the various AWS Lex/Lambda objects.  The order 
+        table holds the order history and is kept unless dropTable is set.
         
         Args:
             self: Instance reference 
+            dropTable: Boolean to also delete the order table
 
         Returns:
+            Dict of resource to error string for each failed delete.  Resources that do not exist are not failures
+        
+        Raises:
             None
+        '''    
+        logger.debug('Entering')
+        failures = self.__destroyBot()
+        failures.update(self.__destroyIntents([intent['name'] for intent in self.intents]))
+        failures.update(self.__destroySlotTypes([slot['name'] for slot in self.slots]))
+        if self.traffic['profile'] == 'keepwarm':
+            failures.update(self.__destroyKeepWarm())
+        failures.update(self.__destroyLambda())
+        if dropTable:
+            failures.update(self.__destroyTable())
+        logger.debug('Exiting')
+        return failures
+    
+    def rollback(self):
+        '''Public function that deletes only the AWS objects created by the last build, e.g. after a failed build.  
+        Objects that existed before the build are left in place.
+        
+        Args:
+            self: Instance reference 
+
+        Returns:
+            Dict of resource to error string for each failed delete
         
         Raises:
-            Various AWS boto3 exceptions
+            None
         '''    
         logger.debug('Entering')
-        self.__destroyBot()
-        self.__destroyIntents()
-        self.__destroySlotTypes()
-        self.__destroyLambda()
+        created = getattr(self, 'created', {})
+        failures = {}
+        if created.get('bot'):
+            failures.update(self.__destroyBot())
+        failures.update(self.__destroyIntents(created.get('intents', [])))
+        failures.update(self.__destroySlotTypes(created.get('slotTypes', [])))
+        if created.get('keepWarm'):
+            failures.update(self.__destroyKeepWarm())
+        if created.get('lambda'):
+            failures.update(self.__destroyLambda())
+        if created.get('table'):
+            failures.update(self.__destroyTable())
+        logger.debug('Exiting')
+        return failures
+        
+
+class MultiRegionBot(object):
+    '''
+    Class that packages and validates a chatbot once, then builds or destroys it in several AWS regions concurrently.
+    '''
+    def __init__(self, config, clientFactory=createClient):
+        '''Fetches user options, packages the bot, and creates a per-region AWSBot for each configured region.
+        
+        Args:
+            self: Instance reference 
+            config: Name of configuration file
+            clientFactory: Function taking a service name and region and returning a client
+        
+        Returns:
+            None
+        
+        Raises:
+            NoSectionError: Raised if section is missing in config file
+            NoOptionError: Raised if option is missing in config file
+            ValueError: Raised if no regions are configured or the packaged resources fail validation
+        '''
+        logger.debug('Entering')
+        cfgParser = configparser.ConfigParser()
+        cfgParser.optionxform = str
+        cfgParser.read(config)
+        regions = [region.strip() for region in cfgParser.get('MultiRegion', 'regions').split(',') if region.strip()]
+        if not regions:
+            raise ValueError('No regions configured in the MultiRegion section')
+        
+        template = AWSBot(config, region=regions[0], clientFactory=clientFactory)
+        template.validate()
+        self.bots = {}
+        for region in regions:
+            role = cfgParser.get('MultiRegion', 'role.' + region, fallback=None)
+            self.bots[region] = template.forRegion(region, role)
         logger.debug('Exiting')
+    
+    def __buildRegion(self, region, bot):
+        '''Builds the bot in one region.  A failed build is rolled back in that region only, deleting only the 
+        objects the build created.
         
+        Args:
+            self: Instance reference 
+            region: AWS region
+            bot: AWSBot instance for the region
+
+        Returns:
+            Dict report with the region status (DEPLOYED, ROLLED_BACK, or FAILED) and error, if any
+        
+        Raises:
+            None
+        '''
+        logger.debug('Entering ' + region)
+        try:
+            status = bot.build()
+            if status == 'READY':
+                logger.debug('Exiting ' + region)
+                return {'status': 'DEPLOYED'}
+            error = 'Bot build status ' + status
+        except Exception as err:
+            error = str(err)
+        
+        logger.debug('***Build Failed in {}***  {}'.format(region, error))
+        try:
+            failures = bot.rollback()
+        except Exception as err:
+            failures = {'rollback': str(err)}
+        if failures:
+            report = {'status': 'FAILED', 'error': error, 'rollbackErrors': failures}
+        else:
+            report = {'status': 'ROLLED_BACK', 'error': error}
+        logger.debug('Exiting ' + region)
+        return report
+    
+    def __destroyRegion(self, region, bot, dropTable):
+        '''Deletes the bot in one region.
+        
+        Args:
+            self: Instance reference 
+            region: AWS region
+            bot: AWSBot instance for the region
+            dropTable: Boolean to also delete the order table
+
+        Returns:
+            Dict report with the region status (DESTROYED or FAILED) and the failed deletes, if any
+        
+        Raises:
+            None
+        '''
+        try:
+            failures = bot.destroy(dropTable)
+        except Exception as err:
+            failures = {'destroy': str(err)}
+        if failures:
+            return {'status': 'FAILED', 'errors': failures}
+        return {'status': 'DESTROYED'}
+    
+    def __runAll(self, func):
+        '''Runs a per-region function for all regions concurrently and collects the reports.
+        
+        Args:
+            self: Instance reference 
+            func: Function taking a region and its AWSBot and returning a report dict
+
+        Returns:
+            Dict of region to report
+        
+        Raises:
+            None
+        '''
+        with ThreadPoolExecutor(max_workers=len(self.bots)) as executor:
+            futures = {region: executor.submit(func, region, bot) for region, bot in self.bots.items()}
+        report = {region: future.result() for region, future in futures.items()}
+        logger.info(json.dumps(report, indent=4, sort_keys=True))
+        return report
+    
+    def build(self):
+        '''Public function that builds the bot in all regions concurrently.
+        
+        Args:
+            self: Instance reference 
+
+        Returns:
+            Dict of region to build report
+        
+        Raises:
+            None
+        '''
+        logger.debug('Entering')
+        report = self.__runAll(self.__buildRegion)
+        logger.debug('Exiting')
+        return report
+    
+    def destroy(self, dropTable=False):
+        '''Public function that deletes the bot in all regions concurrently.  The order tables are kept unless 
+        dropTable is set.
+        
+        Args:
+            self: Instance reference 
+            dropTable: Boolean to also delete the order tables
+
+        Returns:
+            Dict of region to destroy report
+        
+        Raises:
+            None
+        '''
+        logger.debug('Entering')
+        report = self.__runAll(lambda region, bot: self.__destroyRegion(region, bot, dropTable))
+        logger.debug('Exiting')
+        return report
+
 
 if __name__ == '__main__':
     bot = AWSBot('awsbot.cfg')
     bot.build()
     #bot.test('I want to order 2 cords of split firewood to be delivered at 1 pm on tomorrow to 900 Tamarac Pkwy 80863')
     #bot.destroy()
+    #bots = MultiRegionBot('awsbot.cfg')
+    #bots.build()
     
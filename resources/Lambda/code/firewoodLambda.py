@@ -9,14 +9,277 @@ import datetime
 import time
 import os
 import json
+import hashlib
+import logging
+import sqlite3
+from collections import OrderedDict
+import boto3
 from smartystreets_python_sdk import StaticCredentials, exceptions, ClientBuilder
 from smartystreets_python_sdk.us_street import Lookup
+from slotTable import SLOT_TABLE_FILE, normalize, compileSlotTypes
 
-FIREWOOD_TYPES = ['split', 'logs']
+SLOT_TYPES_DIR = '../../SlotTypes'  #slot type configs, used for local runs outside of a package
 PRICE_PER_CORD = {'split' : 200, 'logs' : 150}
 DELIVERY_ZIP = '80863'
 AUTH_ID = 'yourId'
 AUTH_TOKEN = 'yourToken'
+ORDER_TABLE = os.environ.get('ORDER_TABLE', 'firewoodOrders')
+ORDER_DB = os.environ.get('ORDER_DB')  #path to a local SQLite file.  Replaces DynamoDB as the order store when set
+ORDER_BATCH_SIZE = int(os.environ.get('ORDER_BATCH_SIZE', '25'))  #25 is the BatchWriteItem request limit
+ORDER_MAX_AGE = float(os.environ.get('ORDER_MAX_AGE', '30'))
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+class DynamoOrderStore(object):
+    '''
+    Order store backed by a DynamoDB table.  Orders are written with BatchWriteItem.
+    '''
+    def __init__(self, tableName):
+        '''Sets instance variables.
+        
+        Args:
+            self: Instance reference 
+            tableName: Name of the DynamoDB table holding orders
+        
+        Returns:
+            None
+        
+        Raises:
+            None
+        '''
+        self.tableName = tableName
+        self.client = boto3.client('dynamodb')
+    
+    def writeBatch(self, orders):
+        '''Writes a list of orders in chunks of 25.  Unprocessed items are retried with an exponential backoff.
+        
+        Args:
+            self: Instance reference 
+            orders: List of order dicts with string values
+        
+        Returns:
+            None
+        
+        Raises:
+            Exception: Raised if items remain unprocessed after all retries
+            Various AWS boto3 exceptions
+        '''
+        requests = [{'PutRequest': {'Item': {key: {'S': value} for key, value in order.items()}}} for order in orders]
+        for i in range(0, len(requests), 25):
+            pending = {self.tableName: requests[i:i+25]}
+            for attempt in range(5):
+                resp = self.client.batch_write_item(RequestItems=pending)
+                pending = resp.get('UnprocessedItems')
+                if not pending:
+                    break
+                time.sleep(0.05 * 2 ** attempt)
+            if pending:
+                raise Exception('Unable to write {} orders to {}'.format(len(pending[self.tableName]), self.tableName))
+
+
+class SQLiteOrderStore(object):
+    '''
+    Order store backed by a local SQLite file.  Stand-in for DynamoDB during local runs and testing.
+    '''
+    def __init__(self, filename):
+        '''Sets instance variables and creates the orders table if needed.
+        
+        Args:
+            self: Instance reference 
+            filename: Path to the SQLite database file
+        
+        Returns:
+            None
+        
+        Raises:
+            sqlite3.Error
+        '''
+        self.conn = sqlite3.connect(filename)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS orders (orderId TEXT PRIMARY KEY, item TEXT NOT NULL)')
+        self.conn.commit()
+    
+    def writeBatch(self, orders):
+        '''Writes a list of orders in a single transaction.  An existing order with the same id is replaced.
+        
+        Args:
+            self: Instance reference 
+            orders: List of order dicts with string values
+        
+        Returns:
+            None
+        
+        Raises:
+            sqlite3.Error
+        '''
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO orders (orderId, item) VALUES (?, ?)', 
+                                  [(order['orderId'], json.dumps(order, sort_keys=True)) for order in orders])
+
+
+class OrderBuffer(object):
+    '''
+    Write-behind buffer for fulfilled orders.  Orders are held in memory across warm invocations and written to 
+    the order store in batches once the buffer reaches a size or age threshold.  The thresholds are checked before 
+    every invocation returns, including keep-warm pings, which bound how long an order can wait in a quiet container.
+    '''
+    def __init__(self, store, maxSize=ORDER_BATCH_SIZE, maxAge=ORDER_MAX_AGE):
+        '''Sets instance variables.
+        
+        Args:
+            self: Instance reference 
+            store: Order store object providing a writeBatch method
+            maxSize: Number of buffered orders that triggers a flush
+            maxAge: Age in seconds of the oldest buffered order that triggers a flush
+        
+        Returns:
+            None
+        
+        Raises:
+            None
+        '''
+        self.store = store
+        self.maxSize = maxSize
+        self.maxAge = maxAge
+        self.orders = OrderedDict()
+        self.oldest = None
+    
+    def orderKey(self, userId, slots):
+        '''Derives an idempotency key for an order.  A repeated fulfillment of the same order yields the same key.
+        
+        Args:
+            self: Instance reference 
+            userId: Lex user id
+            slots: Dict of slot values for the order
+        
+        Returns:
+            Hex string key
+        
+        Raises:
+            None
+        '''
+        payload = json.dumps([userId, sorted(slots.items())])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def add(self, userId, slots, price):
+        '''Buffers an order.  Duplicates of an already buffered order are collapsed by key.
+        
+        Args:
+            self: Instance reference 
+            userId: Lex user id
+            slots: Dict of slot values for the order
+            price: Price string quoted to the customer
+        
+        Returns:
+            Idempotency key of the order
+        
+        Raises:
+            None
+        '''
+        orderId = self.orderKey(userId, slots)
+        order = {name: str(value) for name, value in slots.items() if value is not None}
+        order['orderId'] = orderId
+        order['userId'] = userId
+        order['Price'] = price
+        order['orderTime'] = datetime.datetime.utcnow().isoformat()
+        if not self.orders:
+            self.oldest = time.time()
+        self.orders[orderId] = order
+        return orderId
+    
+    def isDue(self):
+        '''Checks the buffer against the size and age thresholds.
+        
+        Args:
+            self: Instance reference 
+        
+        Returns:
+            Boolean indicating whether the buffer should be flushed
+        
+        Raises:
+            None
+        '''
+        if not self.orders:
+            return False
+        return len(self.orders) >= self.maxSize or time.time() - self.oldest >= self.maxAge
+    
+    def flush(self, force=False):
+        '''Writes the buffered orders to the order store if a threshold has been reached.  On a write failure the 
+        orders stay buffered and are retried on the next flush.
+        
+        Args:
+            self: Instance reference 
+            force: Boolean to write regardless of thresholds
+        
+        Returns:
+            Number of orders written
+        
+        Raises:
+            None
+        '''
+        if not self.orders or not (force or self.isDue()):
+            return 0
+        orders = list(self.orders.values())
+        try:
+            self.store.writeBatch(orders)
+        except Exception as err:
+            logger.error('Order flush failed, %d orders kept for retry: %s', len(orders), err)
+            return 0
+        self.orders.clear()
+        self.oldest = None
+        return len(orders)
+
+
+def _createOrderStore():
+    '''Creates the order store selected by the environment.  SQLite when ORDER_DB is set, DynamoDB otherwise.
+    
+        Args:
+            None
+        
+        Returns:
+            Order store object
+        
+        Raises:
+            None
+    '''
+    if ORDER_DB:
+        return SQLiteOrderStore(ORDER_DB)
+    else:
+        return DynamoOrderStore(ORDER_TABLE)
+
+#Module-level so buffered orders survive across warm invocations of the same container
+ORDER_BUFFER = OrderBuffer(_createOrderStore())
+
+
+def _loadSlotTypes():
+    '''Loads the slot type lookup table shipped in the Lambda package.  Outside of a package, the table is compiled 
+    from the slot type configs instead.
+    
+        Args:
+            None
+        
+        Returns:
+            Dict of slot type name to a dict of normalized value/synonym to canonical value
+        
+        Raises:
+            ValueError: Raised if a value or synonym maps to two different canonical values within a slot type
+    '''
+    dirname = os.path.dirname(os.path.abspath(__file__))
+    filename = os.path.join(dirname, SLOT_TABLE_FILE)
+    if os.path.exists(filename):
+        with open(filename, 'r') as file:
+            return json.load(file)
+    
+    slots = []
+    slotsDir = os.path.join(dirname, SLOT_TYPES_DIR)
+    for root,_,filenames in os.walk(slotsDir):
+        for filename in filenames:
+            with open(os.path.join(root,filename), 'r') as file:
+                slots.append(json.load(file))
+    return compileSlotTypes(slots)
+
+SLOT_TYPES = _loadSlotTypes()
 
 
 class LexHandler(object):
@@ -43,6 +306,25 @@ class LexHandler(object):
         self.source = event['invocationSource']
         self.sessionAttributes = event['sessionAttributes']
     
+    def __resolveSlotValue(self, slotType, value):
+        '''Resolves a Lex-inputed slot value or synonym to the canonical value of its slot type.
+        
+        Args:
+            self: Instance reference 
+            slotType: Name of the slot type
+            value: String slot value
+        
+        Returns:
+            Canonical value string, or None if the value is not part of the slot type
+        
+        Raises:
+            None
+        '''
+        if value:
+            return SLOT_TYPES.get(slotType, {}).get(normalize(value))
+        else:
+            return None
+    
     def __isValidDeliveryStreet(self, deliveryStreet, deliveryZip):  
         '''Performs a validity check of a given street address and zip code pair.  Leverages the SmartyStreets 
         address verification service.
@@ -154,7 +436,7 @@ class LexHandler(object):
         
         Args:
             self: Instance reference 
-            firewoodType: String indicating requested firewood type
+            firewoodType: Canonical string indicating requested firewood type
         
         Returns:
             Boolean indicating whether the type is valid
@@ -162,7 +444,7 @@ class LexHandler(object):
         Raises:
             None
         '''
-        if firewoodType and firewoodType.lower() in FIREWOOD_TYPES:
+        if firewoodType in PRICE_PER_CORD:
             return True
         else:
             return False
@@ -204,7 +486,9 @@ class LexHandler(object):
         Raises:
             None
         '''
-        firewoodType = self.slots['FirewoodType']
+        firewoodType = self.__resolveSlotValue('FirewoodTypes', self.slots['FirewoodType'])
+        if firewoodType:
+            self.slots['FirewoodType'] = firewoodType
         numberCords = self.slots['NumberCords']
         deliveryDate = self.slots['DeliveryDate']
         deliveryTime = self.slots['DeliveryTime']
@@ -243,6 +527,8 @@ class LexHandler(object):
                                             }
                         }
         else:   
+            price = self.sessionAttributes['Price']
+            ORDER_BUFFER.add(self.userId, self.slots, price)
             msg = 'Thanks, your order for {} cords of {} firewood ' + \
                 'has been placed and will be delivered to {} on {} at {}.  ' + \
                 'We will need to collect a payment of {} upon arrival.'
@@ -253,7 +539,7 @@ class LexHandler(object):
                                         'fulfillmentState': 'Fulfilled',
                                         'message': {'contentType': 'PlainText',
                                                     'content': msg.format(numberCords, firewoodType, deliveryStreet, \
-                                                            deliveryDate, deliveryTime, self.sessionAttributes['Price'])
+                                                            deliveryDate, deliveryTime, price)
                                                     }
                                     }
                     }
@@ -350,15 +636,22 @@ def lambda_handler(event, context):
             context - lambda context.  unused
         
         Returns:
-            Formatted Lambda response object (dict) for consumption by AWS Lex
+            Formatted Lambda response object (dict) for consumption by AWS Lex.  A keep-warm ping is answered 
+            with the ping itself
         
         Raises:
             None
     '''
+    if event.get('keepWarm'):
+        ORDER_BUFFER.flush()  #pings also drain buffered orders that are due during a quiet period
+        return {'keepWarm' : True}
+    
     handler = LexHandler(event)
     os.environ['TZ'] = 'America/Denver'
     time.tzset()
-    return handler.respond()
+    resp = handler.respond()
+    ORDER_BUFFER.flush()
+    return resp
 
 if __name__ == '__main__':
     with open(os.path.join('../TestEvents','orderFirewoodDialogTest.json'), 'r') as file:
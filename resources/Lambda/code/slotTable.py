@@ -0,0 +1,53 @@
+'''
+Created on Oct 18, 2026
+
+Slot type lookup table shared by AWSBot, which compiles it at build time, and the firewood Lambda, which resolves 
+slot values with it.  AWSBot adds this module and the compiled table to the Lambda package.
+
+@author: joey whelan
+'''
+
+SLOT_TABLE_FILE = 'slotTypes.json'  #name of the compiled slot type lookup table inside the Lambda package
+
+
+def normalize(term):
+    '''Normalizes a slot value or synonym for lookup.  Lower-cases and collapses whitespace.
+    
+        Args:
+            term: String slot value or synonym
+        
+        Returns:
+            Normalized string
+        
+        Raises:
+            None
+    '''
+    return ' '.join(term.lower().split())
+
+
+def compileSlotTypes(slots):
+    '''Compiles slot type enumerations into a lookup table.  Every normalized value and synonym maps to its 
+    canonical enumeration value.
+    
+        Args:
+            slots: List of slot type config objects
+        
+        Returns:
+            Dict of slot type name to a dict of normalized value/synonym to canonical value
+        
+        Raises:
+            ValueError: Raised if a value or synonym maps to two different canonical values within a slot type
+    '''
+    table = {}
+    for slot in slots:
+        lookup = {}
+        for enumeration in slot.get('enumerationValues', []):
+            canonical = enumeration['value']
+            for term in [canonical] + enumeration.get('synonyms', []):
+                key = normalize(term)
+                if lookup.get(key, canonical) != canonical:
+                    raise ValueError('Slot type {} maps "{}" to both {} and {}'.format(slot['name'], term, 
+                                                                                      lookup[key], canonical))
+                lookup[key] = canonical
+        table[slot['name']] = lookup
+    return table
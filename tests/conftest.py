@@ -0,0 +1,32 @@
+'''
+Shared pytest fixtures for the AWSBot provisioning code and the firewood Lambda.
+'''
+import os
+import sys
+import json
+import importlib
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_CODE = os.path.join(ROOT, 'resources', 'Lambda', 'code')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, LAMBDA_CODE)
+
+
+@pytest.fixture
+def firewood(tmp_path, monkeypatch):
+    '''Firewood Lambda module, reloaded with its order store pointed at a temporary SQLite file'''
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    monkeypatch.setenv('ORDER_DB', str(tmp_path / 'orders.db'))
+    import firewoodLambda
+    return importlib.reload(firewoodLambda)
+
+
+@pytest.fixture
+def fulfillmentEvent():
+    '''OrderFirewood fulfillment event built from the dialog test event'''
+    with open(os.path.join(ROOT, 'resources', 'Lambda', 'TestEvents', 'orderFirewoodDialogTest.json'), 'r') as file:
+        event = json.load(file)
+    event['invocationSource'] = 'FulfillmentCodeHook'
+    event['sessionAttributes'] = {'Price': '$200'}
+    return event
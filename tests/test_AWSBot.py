@@ -0,0 +1,237 @@
+'''
+Tests for AWSBot provisioning against stubbed AWS clients.
+'''
+import os
+import json
+import zipfile
+import pytest
+import botocore.session
+from botocore.stub import Stubber, ANY
+from conftest import ROOT
+import AWSBot
+
+ALIAS_ARN = 'arn:aws:lambda:us-east-1:123456789012:function:firewoodLambda:live'
+RULE_ARN = 'arn:aws:events:us-east-1:123456789012:rule/firewoodLambda-keepwarm'
+SERVICES = ['lex-models', 'lex-runtime', 'lambda', 'dynamodb', 'events']
+
+
+def writeConfig(tmp_path, profile, regions='us-east-1, us-west-2'):
+    '''Writes a config pointing at the repo resources, with a Lambda package and traffic profile in tmp_path'''
+    with zipfile.ZipFile(str(tmp_path / 'firewoodLambda.zip'), 'w') as package:
+        package.write(os.path.join(ROOT, 'resources', 'Lambda', 'code', 'firewoodLambda.py'), 'firewoodLambda.py')
+    with open(os.path.join(ROOT, 'resources', 'Lambda', 'firewoodLambda.json'), 'r') as file:
+        _lambda = json.load(file)
+    with open(str(tmp_path / 'firewoodLambda.json'), 'w') as file:
+        json.dump(_lambda, file)
+    
+    resources = os.path.join(ROOT, 'resources')
+    config = tmp_path / 'awsbot.cfg'
+    config.write_text('\n'.join([
+        '[AWSBot]',
+        'botJsonFile = ' + os.path.join(resources, 'Bot', 'firewoodBot.json'),
+        'slotsDir = ' + os.path.join(resources, 'SlotTypes'),
+        'intentsDir = ' + os.path.join(resources, 'IntentTypes'),
+        'lambdaJsonFile = ' + str(tmp_path / 'firewoodLambda.json'),
+        'permissionsDir = ' + os.path.join(resources, 'Permissions'),
+        'tableJsonFile = ' + os.path.join(resources, 'Tables', 'firewoodOrders.json'),
+        '[Traffic]',
+        'profile = ' + profile,
+        'alias = live',
+        'provisionedConcurrency = 2',
+        'keepWarmSchedule = rate(5 minutes)',
+        '[MultiRegion]',
+        'regions = ' + regions,
+        'role.us-west-2 = arn:aws:iam::123456789012:role/westRole',
+    ]))
+    return str(config)
+
+
+def createClient(service, region='us-east-1'):
+    session = botocore.session.get_session()
+    return session.create_client(service, region_name=region, aws_access_key_id='id', aws_secret_access_key='key')
+
+
+def stubBuild(stubbers, profile):
+    '''Queues the responses and expected parameters of a full build with the given traffic profile'''
+    stubbers['dynamodb'].add_response('create_table', {})
+    stubbers['dynamodb'].add_response('describe_table', {'Table': {'TableStatus': 'ACTIVE'}})
+    
+    lambdaStub = stubbers['lambda']
+    lambdaStub.add_response('create_function', {}, {'FunctionName': 'firewoodLambda', 'Code': ANY, 'Runtime': ANY, 
+                                                    'Role': ANY, 'Handler': ANY, 'Environment': ANY})
+    lambdaStub.add_response('get_function', {'Configuration': {'State': 'Active'}}, {'FunctionName': 'firewoodLambda'})
+    qualifier = {}
+    if profile != 'none':
+        qualifier = {'Qualifier': 'live'}
+        lambdaStub.add_response('publish_version', {'Version': '1'}, {'FunctionName': 'firewoodLambda'})
+        lambdaStub.add_response('get_function_configuration', {'State': 'Active'}, 
+                                {'FunctionName': 'firewoodLambda', 'Qualifier': '1'})
+        lambdaStub.add_response('create_alias', {'AliasArn': ALIAS_ARN}, 
+                                {'FunctionName': 'firewoodLambda', 'Name': 'live', 'FunctionVersion': '1'})
+    for _ in range(2):
+        lambdaStub.add_response('add_permission', {'Statement': '{}'}, 
+                                dict({'Action': 'lambda:InvokeFunction', 'FunctionName': 'firewoodLambda', 
+                                      'Principal': 'lex.amazonaws.com', 'SourceArn': ANY, 'StatementId': ANY}, 
+                                     **qualifier))
+    if profile == 'provisioned':
+        lambdaStub.add_response('put_provisioned_concurrency_config', {}, 
+                                {'FunctionName': 'firewoodLambda', 'Qualifier': 'live', 
+                                 'ProvisionedConcurrentExecutions': 2})
+    elif profile == 'keepwarm':
+        stubbers['events'].add_response('put_rule', {'RuleArn': RULE_ARN}, 
+                                        {'Name': 'firewoodLambda-keepwarm', 'ScheduleExpression': 'rate(5 minutes)', 
+                                         'State': 'ENABLED'})
+        lambdaStub.add_response('add_permission', {'Statement': '{}'}, 
+                                {'Action': 'lambda:InvokeFunction', 'FunctionName': 'firewoodLambda', 
+                                 'Qualifier': 'live', 'Principal': 'events.amazonaws.com', 'SourceArn': RULE_ARN, 
+                                 'StatementId': 'firewoodLambda-keepwarm'})
+        stubbers['events'].add_response('put_targets', {'FailedEntryCount': 0, 'FailedEntries': []}, 
+                                        {'Rule': 'firewoodLambda-keepwarm', 
+                                         'Targets': [{'Id': 'firewoodLambda-keepwarm', 'Arn': ALIAS_ARN, 
+                                                      'Input': json.dumps({'keepWarm': True})}]})
+    
+    stubbers['lex-models'].add_response('put_slot_type', {})
+    stubbers['lex-models'].add_response('put_intent', {})
+    stubbers['lex-models'].add_response('put_intent', {})
+    stubbers['lex-models'].add_response('put_bot', {})
+    stubbers['lex-models'].add_response('get_bot', {'status': 'READY'})
+
+
+@pytest.fixture(autouse=True)
+def noSleep(monkeypatch):
+    monkeypatch.setattr(AWSBot.time, 'sleep', lambda seconds: None)
+
+
+@pytest.fixture
+def clients():
+    return {service: createClient(service) for service in SERVICES}
+
+
+def createBot(config, clients):
+    return AWSBot.AWSBot(config, buildClient=clients['lex-models'], testClient=clients['lex-runtime'], 
+                         lambdaClient=clients['lambda'], dbClient=clients['dynamodb'], eventsClient=clients['events'])
+
+
+@pytest.mark.parametrize('profile', ['none', 'keepwarm', 'provisioned'])
+def test_build_traffic_profile(tmp_path, clients, profile):
+    bot = createBot(writeConfig(tmp_path, profile), clients)
+    stubbers = {service: Stubber(client) for service, client in clients.items()}
+    stubBuild(stubbers, profile)
+    for stubber in stubbers.values():
+        stubber.activate()
+    
+    assert bot.build() == 'READY'
+    for stubber in stubbers.values():
+        stubber.assert_no_pending_responses()
+
+
+@pytest.mark.parametrize('profile, uri', [('none', ':function:firewoodLambda'), 
+                                          ('keepwarm', ':function:firewoodLambda:live')])
+def test_code_hooks_target_alias(tmp_path, clients, profile, uri):
+    bot = createBot(writeConfig(tmp_path, profile), clients)
+    for intent in bot.intents:
+        assert intent['fulfillmentActivity']['codeHook']['uri'].endswith(uri)
+
+
+class RegionalClients(object):
+    '''Client factory handing out one stubbed client per service and region'''
+    def __init__(self):
+        self.clients = {}
+        self.stubbers = {}
+    
+    def __call__(self, service, region):
+        if (service, region) not in self.clients:
+            client = createClient(service, region)
+            self.clients[(service, region)] = client
+            self.stubbers[(service, region)] = Stubber(client)
+            self.stubbers[(service, region)].activate()
+        return self.clients[(service, region)]
+    
+    def forRegion(self, region):
+        for service in SERVICES:
+            self(service, region)
+        return {service: self.stubbers[(service, region)] for service in SERVICES}
+    
+    def assertNoPendingResponses(self):
+        for stubber in self.stubbers.values():
+            stubber.assert_no_pending_responses()
+
+
+def test_empty_regions_raise(tmp_path):
+    config = writeConfig(tmp_path, 'none', regions='')
+    with pytest.raises(ValueError):
+        AWSBot.MultiRegionBot(config, clientFactory=RegionalClients())
+
+
+def test_regional_arns_and_role(tmp_path):
+    factory = RegionalClients()
+    bots = AWSBot.MultiRegionBot(writeConfig(tmp_path, 'none'), clientFactory=factory)
+    west = bots.bots['us-west-2']
+    assert west.lambdaClient is factory.clients[('lambda', 'us-west-2')]
+    assert west._lambda['Role'] == 'arn:aws:iam::123456789012:role/westRole'
+    assert all(':us-west-2:' in permission['SourceArn'] for permission in west.permissions)
+    assert all(':us-west-2:' in intent['fulfillmentActivity']['codeHook']['uri'] for intent in west.intents)
+    assert all(':us-east-1:' in intent['fulfillmentActivity']['codeHook']['uri'] for intent in bots.bots['us-east-1'].intents)
+
+
+def test_failed_redeploy_keeps_existing_resources(tmp_path):
+    factory = RegionalClients()
+    bots = AWSBot.MultiRegionBot(writeConfig(tmp_path, 'none'), clientFactory=factory)
+    stubBuild(factory.forRegion('us-east-1'), 'none')
+    west = factory.forRegion('us-west-2')
+    west['dynamodb'].add_client_error('create_table', 'ResourceInUseException')
+    west['dynamodb'].add_response('describe_table', {'Table': {'TableStatus': 'ACTIVE'}})
+    west['lambda'].add_client_error('create_function', 'ResourceConflictException')
+    
+    report = bots.build()
+    assert report['us-east-1'] == {'status': 'DEPLOYED'}
+    assert report['us-west-2']['status'] == 'ROLLED_BACK'
+    factory.assertNoPendingResponses()
+
+
+def test_rollback_failures_are_reported(tmp_path):
+    factory = RegionalClients()
+    bots = AWSBot.MultiRegionBot(writeConfig(tmp_path, 'none'), clientFactory=factory)
+    stubBuild(factory.forRegion('us-east-1'), 'none')
+    west = factory.forRegion('us-west-2')
+    west['dynamodb'].add_response('create_table', {})
+    west['dynamodb'].add_response('describe_table', {'Table': {'TableStatus': 'ACTIVE'}})
+    west['lambda'].add_response('create_function', {})
+    west['lambda'].add_response('get_function', {'Configuration': {'State': 'Active'}})
+    west['lambda'].add_response('add_permission', {'Statement': '{}'})
+    west['lambda'].add_response('add_permission', {'Statement': '{}'})
+    west['lex-models'].add_client_error('put_slot_type', 'BadRequestException')
+    west['lambda'].add_client_error('delete_function', 'AccessDeniedException')
+    west['dynamodb'].add_client_error('delete_table', 'AccessDeniedException')
+    
+    report = bots.build()
+    assert report['us-east-1'] == {'status': 'DEPLOYED'}
+    assert report['us-west-2']['status'] == 'FAILED'
+    assert sorted(report['us-west-2']['rollbackErrors']) == ['function firewoodLambda', 'table firewoodOrders']
+    factory.assertNoPendingResponses()
+
+
+def test_destroy_reports_failures_and_ignores_missing(tmp_path, clients):
+    bot = createBot(writeConfig(tmp_path, 'none'), clients)
+    stubbers = {service: Stubber(client) for service, client in clients.items()}
+    stubbers['lex-models'].add_client_error('delete_bot', 'NotFoundException')
+    stubbers['lex-models'].add_response('delete_intent', {})
+    stubbers['lex-models'].add_response('delete_intent', {})
+    stubbers['lex-models'].add_response('delete_slot_type', {})
+    stubbers['lambda'].add_client_error('delete_function', 'AccessDeniedException')
+    for stubber in stubbers.values():
+        stubber.activate()
+    
+    assert list(bot.destroy()) == ['function firewoodLambda']
+    for stubber in stubbers.values():
+        stubber.assert_no_pending_responses()
+
+
+def test_validate_reports_malformed_code_hook(tmp_path, clients):
+    bot = createBot(writeConfig(tmp_path, 'none'), clients)
+    bot.intents[0]['fulfillmentActivity']['codeHook']['uri'] = 'arn:aws:lambda:us-east-1'
+    bot.permissions[0]['FunctionName'] = 'otherLambda'
+    with pytest.raises(ValueError) as err:
+        bot.validate()
+    assert 'is not a Lambda function ARN' in str(err.value)
+    assert 'is not for firewoodLambda' in str(err.value)
@@ -0,0 +1,120 @@
+'''
+Tests for the firewood Lambda order persistence.
+'''
+import json
+import pytest
+from botocore.stub import Stubber
+
+
+def storedOrders(firewood):
+    rows = firewood.ORDER_BUFFER.store.conn.execute('SELECT item FROM orders').fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+
+def fulfill(firewood, event, userId='John'):
+    event = json.loads(json.dumps(event))
+    event['userId'] = userId
+    return firewood.lambda_handler(event, None)
+
+
+def test_fulfillment_buffers_order_until_due(firewood, fulfillmentEvent):
+    firewood.ORDER_BUFFER.maxSize = 2
+    resp = fulfill(firewood, fulfillmentEvent)
+    assert resp['dialogAction']['fulfillmentState'] == 'Fulfilled'
+    assert len(firewood.ORDER_BUFFER.orders) == 1
+    assert storedOrders(firewood) == []
+    
+    fulfill(firewood, fulfillmentEvent, 'Jane')
+    assert not firewood.ORDER_BUFFER.orders
+    orders = sorted(storedOrders(firewood), key=lambda order: order['userId'])
+    assert [order['userId'] for order in orders] == ['Jane', 'John']
+    assert orders[1]['Price'] == '$200'
+    assert orders[1]['FirewoodType'] == 'split'
+
+
+def test_aged_order_is_flushed_before_returning(firewood, fulfillmentEvent):
+    firewood.ORDER_BUFFER.maxAge = 0
+    fulfill(firewood, fulfillmentEvent)
+    assert len(storedOrders(firewood)) == 1
+
+
+def test_keep_warm_ping_flushes_only_due_orders(firewood, fulfillmentEvent):
+    fulfill(firewood, fulfillmentEvent)
+    firewood.lambda_handler({'keepWarm': True}, None)
+    assert storedOrders(firewood) == []
+    
+    firewood.ORDER_BUFFER.maxAge = 0
+    firewood.lambda_handler({'keepWarm': True}, None)
+    assert len(storedOrders(firewood)) == 1
+
+
+def test_repeated_fulfillment_is_idempotent(firewood, fulfillmentEvent):
+    firewood.ORDER_BUFFER.maxAge = 0
+    fulfill(firewood, fulfillmentEvent)
+    fulfill(firewood, fulfillmentEvent)
+    assert len(storedOrders(firewood)) == 1
+
+
+def test_failed_flush_keeps_orders_for_retry(firewood, fulfillmentEvent, monkeypatch):
+    firewood.ORDER_BUFFER.maxAge = 0
+    def fail(orders):
+        raise Exception('store unavailable')
+    monkeypatch.setattr(firewood.ORDER_BUFFER.store, 'writeBatch', fail)
+    fulfill(firewood, fulfillmentEvent)
+    assert len(firewood.ORDER_BUFFER.orders) == 1
+    
+    monkeypatch.undo()
+    fulfill(firewood, fulfillmentEvent, 'Jane')
+    assert not firewood.ORDER_BUFFER.orders
+    assert len(storedOrders(firewood)) == 2
+
+
+def dynamoStore(firewood, monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'id')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'key')
+    monkeypatch.setattr(firewood.time, 'sleep', lambda seconds: None)
+    store = firewood.DynamoOrderStore('firewoodOrders')
+    return store, Stubber(store.client)
+
+
+def putRequests(orders):
+    return [{'PutRequest': {'Item': {'orderId': {'S': order['orderId']}}}} for order in orders]
+
+
+def test_dynamo_store_writes_in_chunks_and_retries_unprocessed(firewood, monkeypatch):
+    store, stubber = dynamoStore(firewood, monkeypatch)
+    orders = [{'orderId': str(i)} for i in range(30)]
+    stubber.add_response('batch_write_item', {'UnprocessedItems': {'firewoodOrders': putRequests(orders[20:25])}}, 
+                         {'RequestItems': {'firewoodOrders': putRequests(orders[:25])}})
+    stubber.add_response('batch_write_item', {'UnprocessedItems': {}}, 
+                         {'RequestItems': {'firewoodOrders': putRequests(orders[20:25])}})
+    stubber.add_response('batch_write_item', {'UnprocessedItems': {}}, 
+                         {'RequestItems': {'firewoodOrders': putRequests(orders[25:])}})
+    with stubber:
+        store.writeBatch(orders)
+        stubber.assert_no_pending_responses()
+
+
+def test_dynamo_store_raises_when_items_stay_unprocessed(firewood, monkeypatch):
+    store, stubber = dynamoStore(firewood, monkeypatch)
+    orders = [{'orderId': '1'}]
+    for _ in range(5):
+        stubber.add_response('batch_write_item', {'UnprocessedItems': {'firewoodOrders': putRequests(orders)}})
+    with stubber:
+        with pytest.raises(Exception, match='Unable to write 1 orders'):
+            store.writeBatch(orders)
+        stubber.assert_no_pending_responses()
+
+
+def test_synonym_resolves_to_canonical_value(firewood, fulfillmentEvent):
+    fulfillmentEvent['currentIntent']['slots']['FirewoodType'] = 'Cut  Wood'
+    resp = firewood.lambda_handler(fulfillmentEvent, None)
+    assert 'of split firewood' in resp['dialogAction']['message']['content']
+    assert list(firewood.ORDER_BUFFER.orders.values())[0]['FirewoodType'] == 'split'
+
+
+def test_keep_warm_ping_returns_early(firewood, monkeypatch):
+    def fail(event):
+        raise AssertionError('Lex logic ran for a keep-warm ping')
+    monkeypatch.setattr(firewood, 'LexHandler', fail)
+    assert firewood.lambda_handler({'keepWarm': True}, None) == {'keepWarm': True}
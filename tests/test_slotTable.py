@@ -0,0 +1,26 @@
+'''
+Tests for the slot type lookup table shared by AWSBot and the firewood Lambda.
+'''
+import os
+import pytest
+import slotTable
+import AWSBot
+from conftest import LAMBDA_CODE
+
+
+def test_values_and_synonyms_map_to_canonical_value():
+    slots = [{'name': 'FirewoodTypes', 'enumerationValues': [{'value': 'split', 'synonyms': ['Cut Wood']}]}]
+    table = slotTable.compileSlotTypes(slots)
+    assert table == {'FirewoodTypes': {'split': 'split', 'cut wood': 'split'}}
+    assert table['FirewoodTypes'][slotTable.normalize('  CUT   wood ')] == 'split'
+
+
+def test_conflicting_synonym_raises():
+    slots = [{'name': 'FirewoodTypes', 'enumerationValues': [{'value': 'split', 'synonyms': ['logs']}, 
+                                                               {'value': 'logs'}]}]
+    with pytest.raises(ValueError):
+        slotTable.compileSlotTypes(slots)
+
+
+def test_awsbot_ships_the_lambda_slot_table_module():
+    assert os.path.abspath(AWSBot.slotTable.__file__) == os.path.join(LAMBDA_CODE, 'slotTable.py')